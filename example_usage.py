@@ -2,12 +2,21 @@
 Ejemplo de uso de la API MailSystem
 
 Este script muestra cómo usar la API para enviar correos electrónicos
-desde Python usando la biblioteca requests.
+desde Python usando la biblioteca httpx en modo asíncrono.
+
+Todos los ejemplos comparten un único httpx.AsyncClient, de modo que
+reutilizan la misma conexión y pueden ejecutarse de forma concurrente
+con asyncio.gather.
+
+Requiere: pip install "httpx[http2]"
 """
 
-import requests
+import asyncio
+import httpx
 import base64
 import json
+import mimetypes
+import mmap
 import os
 
 # URL base de la API
@@ -17,32 +26,69 @@ API_URL = "http://localhost:8000"
 # En producción, usa variables de entorno: os.getenv('API_KEY')
 API_KEY = os.getenv('API_KEY', 'tu_api_key_secreta_aqui')
 
+# Tamaño de bloque para leer adjuntos (múltiplo de 57 bytes, alineado con base64)
+TAMANO_BLOQUE_BASE64 = 57 * 1024
+
+# Tipos MIME más comunes según la extensión del archivo
+TIPOS_MIME = {
+    '.pdf': 'application/pdf',
+    '.txt': 'text/plain',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+}
+
 # Headers con autenticación
 HEADERS = {
     "X-API-Key": API_KEY,
     "Content-Type": "application/json"
 }
 
-def ejemplo_correo_simple():
-    """Ejemplo 1: Enviar un correo simple con texto plano"""
-    print("📧 Enviando correo simple...")
+
+def crear_cliente() -> httpx.AsyncClient:
+    """
+    Crea el cliente HTTP compartido por todos los ejemplos.
     
-    response = requests.post(
-        f"{API_URL}/send-email",
+    El cliente ya incluye la URL base y los headers de autenticación,
+    mantiene un pool de conexiones keep-alive y reintenta los fallos
+    de conexión, por lo que cada solicitud solo indica la ruta.
+    """
+    return httpx.AsyncClient(
+        base_url=API_URL,
         headers=HEADERS,
-        json={
-            "subject": "Prueba de correo simple",
-            "body": "Este es un correo de prueba desde la API MailSystem.",
-            "recipients": ["destinatario@example.com"]
-        }
+        timeout=30,
+        # El pool y los reintentos se configuran en el transporte
+        transport=httpx.AsyncHTTPTransport(
+            http2=True,
+            retries=3,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+        )
     )
+
+
+async def _post(client: httpx.AsyncClient, payload: dict) -> httpx.Response:
+    """Envía una solicitud al endpoint /send-email usando el cliente compartido"""
+    return await client.post("/send-email", json=payload)
+
+
+async def ejemplo_correo_simple(client: httpx.AsyncClient):
+    """Ejemplo 1: Enviar un correo simple con texto plano"""
+    print("📧 Enviando correo simple...")
+    
+    response = await _post(client, {
+        "subject": "Prueba de correo simple",
+        "body": "Este es un correo de prueba desde la API MailSystem.",
+        "recipients": ["destinatario@example.com"]
+    })
     
     print(f"Estado: {response.status_code}")
     print(f"Respuesta: {json.dumps(response.json(), indent=2)}")
     print()
 
 
-def ejemplo_correo_html():
+async def ejemplo_correo_html(client: httpx.AsyncClient):
     """Ejemplo 2: Enviar un correo con formato HTML"""
     print("📧 Enviando correo HTML...")
     
@@ -61,23 +107,19 @@ def ejemplo_correo_html():
     </html>
     """
     
-    response = requests.post(
-        f"{API_URL}/send-email",
-        headers=HEADERS,
-        json={
-            "subject": "Correo con formato HTML",
-            "body": html_body,
-            "recipients": ["destinatario@example.com"],
-            "is_html": True
-        }
-    )
+    response = await _post(client, {
+        "subject": "Correo con formato HTML",
+        "body": html_body,
+        "recipients": ["destinatario@example.com"],
+        "is_html": True
+    })
     
     print(f"Estado: {response.status_code}")
     print(f"Respuesta: {json.dumps(response.json(), indent=2)}")
     print()
 
 
-def ejemplo_correo_con_adjunto():
+async def ejemplo_correo_con_adjunto(client: httpx.AsyncClient):
     """Ejemplo 3: Enviar un correo con archivo adjunto"""
     print("📧 Enviando correo con adjunto...")
     
@@ -86,98 +128,94 @@ def ejemplo_correo_con_adjunto():
     contenido_archivo = "Este es el contenido de un archivo de ejemplo.\nPuede contener cualquier texto."
     contenido_base64 = base64.b64encode(contenido_archivo.encode('utf-8')).decode('utf-8')
     
-    response = requests.post(
-        f"{API_URL}/send-email",
-        headers=HEADERS,
-        json={
-            "subject": "Correo con archivo adjunto",
-            "body": "Por favor encuentra adjunto el archivo de ejemplo.",
-            "recipients": ["destinatario@example.com"],
-            "attachments": [
-                {
-                    "filename": "ejemplo.txt",
-                    "content": contenido_base64,
-                    "content_type": "text/plain"
-                }
-            ]
-        }
-    )
+    response = await _post(client, {
+        "subject": "Correo con archivo adjunto",
+        "body": "Por favor encuentra adjunto el archivo de ejemplo.",
+        "recipients": ["destinatario@example.com"],
+        "attachments": [
+            {
+                "filename": "ejemplo.txt",
+                "content": contenido_base64,
+                "content_type": "text/plain"
+            }
+        ]
+    })
     
     print(f"Estado: {response.status_code}")
     print(f"Respuesta: {json.dumps(response.json(), indent=2)}")
     print()
 
 
-def ejemplo_correo_multiple_destinatarios():
+async def ejemplo_correo_multiple_destinatarios(client: httpx.AsyncClient):
     """Ejemplo 4: Enviar correo a múltiples destinatarios"""
     print("📧 Enviando correo a múltiples destinatarios...")
     
-    response = requests.post(
-        f"{API_URL}/send-email",
-        headers=HEADERS,
-        json={
-            "subject": "Correo a múltiples destinatarios",
-            "body": "Este correo se enviará a todos los destinatarios en la lista.",
-            "recipients": [
-                "destinatario1@example.com",
-                "destinatario2@example.com",
-                "destinatario3@example.com"
-            ]
-        }
-    )
+    response = await _post(client, {
+        "subject": "Correo a múltiples destinatarios",
+        "body": "Este correo se enviará a todos los destinatarios en la lista.",
+        "recipients": [
+            "destinatario1@example.com",
+            "destinatario2@example.com",
+            "destinatario3@example.com"
+        ]
+    })
     
     print(f"Estado: {response.status_code}")
     print(f"Respuesta: {json.dumps(response.json(), indent=2)}")
     print()
 
 
-def ejemplo_adjunto_desde_archivo(ruta_archivo: str):
+async def ejemplo_adjunto_desde_archivo(client: httpx.AsyncClient, ruta_archivo: str):
     """
     Ejemplo 5: Enviar correo con adjunto desde un archivo del sistema
     
     Args:
+        client: Cliente HTTP compartido
         ruta_archivo: Ruta al archivo que se desea adjuntar
     """
     print(f"📧 Enviando correo con adjunto desde archivo: {ruta_archivo}")
     
     try:
-        # Leer el archivo y codificarlo en base64
+        # Mapear el archivo en memoria y codificarlo en base64 por bloques
+        # Con mmap el sistema operativo carga las páginas bajo demanda (sin
+        # copiarlas a un buffer de lectura), y los bloques son múltiplo de
+        # 3 bytes, así cada fragmento codificado se puede concatenar sin
+        # relleno intermedio
+        buffer_base64 = bytearray()
         with open(ruta_archivo, "rb") as f:
-            contenido = f.read()
-            contenido_base64 = base64.b64encode(contenido).decode('utf-8')
+            # mmap no admite archivos vacíos
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for inicio in range(0, len(mm), TAMANO_BLOQUE_BASE64):
+                        buffer_base64.extend(
+                            base64.b64encode(mm[inicio:inicio + TAMANO_BLOQUE_BASE64])
+                        )
+        contenido_base64 = buffer_base64.decode('ascii')
         
         # Determinar el tipo MIME basado en la extensión
-        extension = ruta_archivo.split('.')[-1].lower()
-        tipos_mime = {
-            'pdf': 'application/pdf',
-            'txt': 'text/plain',
-            'jpg': 'image/jpeg',
-            'jpeg': 'image/jpeg',
-            'png': 'image/png',
-            'doc': 'application/msword',
-            'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-        }
-        content_type = tipos_mime.get(extension, 'application/octet-stream')
+        # Si no está en la tabla, se consulta la base de datos de mimetypes
+        extension = os.path.splitext(ruta_archivo)[1].lower()
+        content_type = (
+            TIPOS_MIME.get(extension)
+            or mimetypes.guess_type(ruta_archivo)[0]
+            or 'application/octet-stream'
+        )
         
         # Obtener solo el nombre del archivo (sin la ruta)
-        nombre_archivo = ruta_archivo.split('/')[-1]
+        nombre_archivo = os.path.basename(ruta_archivo)
         
-        response = requests.post(
-            f"{API_URL}/send-email",
-            headers=HEADERS,
-            json={
-                "subject": f"Correo con adjunto: {nombre_archivo}",
-                "body": f"Por favor encuentra adjunto el archivo {nombre_archivo}.",
-                "recipients": ["destinatario@example.com"],
-                "attachments": [
-                    {
-                        "filename": nombre_archivo,
-                        "content": contenido_base64,
-                        "content_type": content_type
-                    }
-                ]
-            }
-        )
+        response = await _post(client, {
+            "subject": f"Correo con adjunto: {nombre_archivo}",
+            "body": f"Por favor encuentra adjunto el archivo {nombre_archivo}.",
+            "recipients": ["destinatario@example.com"],
+            "attachments": [
+                {
+                    "filename": nombre_archivo,
+                    "content": contenido_base64,
+                    "content_type": content_type
+                }
+            ]
+        })
         
         print(f"Estado: {response.status_code}")
         print(f"Respuesta: {json.dumps(response.json(), indent=2)}")
@@ -189,12 +227,12 @@ def ejemplo_adjunto_desde_archivo(ruta_archivo: str):
         print(f"❌ Error: {str(e)}")
 
 
-def verificar_salud_api():
+async def verificar_salud_api(client: httpx.AsyncClient):
     """Verificar que la API esté funcionando correctamente"""
     print("🏥 Verificando salud de la API...")
     
     try:
-        response = requests.get(f"{API_URL}/health")
+        response = await client.get("/health")
         print(f"Estado: {response.status_code}")
         print(f"Respuesta: {json.dumps(response.json(), indent=2)}")
         print()
@@ -206,26 +244,39 @@ def verificar_salud_api():
         return False
 
 
+async def main():
+    """
+    Ejecuta los ejemplos compartiendo un único cliente HTTP.
+    
+    El cliente mantiene un pool de conexiones keep-alive, por lo que todos
+    los ejemplos reutilizan la conexión y asyncio.gather los ejecuta de
+    forma concurrente (el tiempo total es el del ejemplo más lento).
+    """
+    async with crear_cliente() as client:
+        # Verificar que la API esté funcionando
+        if not await verificar_salud_api(client):
+            print("⚠️  La API no está disponible. Por favor, inicia la API primero.")
+            print("   Ejecuta: docker-compose up")
+            exit(1)
+        
+        # Ejecutar ejemplos
+        # Descomenta los ejemplos que quieras probar:
+        await asyncio.gather(
+            # ejemplo_correo_simple(client),
+            # ejemplo_correo_html(client),
+            # ejemplo_correo_con_adjunto(client),
+            # ejemplo_correo_multiple_destinatarios(client),
+            # ejemplo_adjunto_desde_archivo(client, "ruta/a/tu/archivo.pdf"),
+        )
+
+
 if __name__ == "__main__":
     print("=" * 60)
     print("EJEMPLOS DE USO DE LA API MAILSYSTEM")
     print("=" * 60)
     print()
     
-    # Verificar que la API esté funcionando
-    if not verificar_salud_api():
-        print("⚠️  La API no está disponible. Por favor, inicia la API primero.")
-        print("   Ejecuta: docker-compose up")
-        exit(1)
-    
-    # Ejecutar ejemplos
-    # Descomenta los ejemplos que quieras probar:
-    
-    # ejemplo_correo_simple()
-    # ejemplo_correo_html()
-    # ejemplo_correo_con_adjunto()
-    # ejemplo_correo_multiple_destinatarios()
-    # ejemplo_adjunto_desde_archivo("ruta/a/tu/archivo.pdf")
+    asyncio.run(main())
     
     print("💡 Descomenta los ejemplos en el código para probarlos.")
     print("⚠️  Recuerda cambiar 'destinatario@example.com' por direcciones reales.")
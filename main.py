@@ -10,22 +10,25 @@ Versión: 1.0.0
 """
 
 from fastapi import FastAPI, HTTPException, status, Depends, Security, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.security import APIKeyHeader
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import List, Optional
-import smtplib
+from typing import Annotated, List, Optional
+from contextlib import asynccontextmanager
+import aiosmtplib
+import asyncio
 import os
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from email.mime.base import MIMEBase
-from email import encoders
-import base64
+import time
+from email.message import EmailMessage, MIMEPart
+from email import policy
 from datetime import datetime
 import logging
 from dotenv import load_dotenv
+from functools import lru_cache
 import ipaddress
+import hmac
+import re
 
 # Cargar variables de entorno desde el archivo .env
 # Esto es útil para desarrollo local
@@ -47,6 +50,23 @@ logger = logging.getLogger(__name__)
 # FastAPI Security proporciona una forma estándar de manejar autenticación
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+# Rutas de documentación que queremos proteger
+DOCS_PATHS = ("/docs", "/redoc", "/openapi.json")
+
+# Espacios y saltos de línea, que se eliminan del contenido base64 de los adjuntos
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# Texto base64 válido: caracteres del alfabeto base64 y relleno "=" al final
+BASE64_PATTERN = re.compile(r'[A-Za-z0-9+/]*={0,2}')
+
+# Redes privadas (RFC 1918), usadas normalmente por Docker y redes locales
+# Se construyen una sola vez al importar el módulo
+PRIVATE_NETWORKS = tuple(
+    ipaddress.ip_network(network)
+    for network in ("10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16")
+)
+
+@lru_cache(maxsize=1)
 def get_allowed_ips():
     """
     Obtiene la lista de IPs permitidas desde las variables de entorno.
@@ -56,28 +76,84 @@ def get_allowed_ips():
     
     También soporta rangos CIDR, ej: "192.168.1.0/24"
     
+    El resultado se cachea tras la primera lectura; usa reload_config()
+    para volver a leerlo.
+    
+    Se devuelve como frozenset, así comprobaciones como
+    "127.0.0.1" in get_allowed_ips() no recorren toda la lista.
+    
     Returns:
-        list: Lista de IPs o rangos permitidos
+        frozenset: IPs o rangos permitidos
     """
     allowed_ips_str = os.getenv('ALLOWED_IPS', '')
-    if not allowed_ips_str:
-        return []
     
     # Separar por comas y limpiar espacios
-    ips = [ip.strip() for ip in allowed_ips_str.split(',') if ip.strip()]
-    return ips
+    return frozenset(ip.strip() for ip in allowed_ips_str.split(',') if ip.strip())
 
 
+@lru_cache(maxsize=1)
 def get_api_key():
     """
     Obtiene la API Key desde las variables de entorno.
     
+    El valor se cachea tras la primera lectura, ya que las variables de
+    entorno no cambian mientras la aplicación está en ejecución; usa
+    reload_config() para volver a leerlo.
+    
     Returns:
         str: API Key configurada, o None si no está configurada
     """
     return os.getenv('API_KEY')
 
 
+@lru_cache(maxsize=1)
+def parse_allowed_networks(allowed_ips: frozenset) -> tuple:
+    """
+    Convierte las IPs permitidas en redes de ipaddress ya parseadas.
+    
+    El resultado se cachea según las IPs recibidas, de modo que el parseo
+    se hace una sola vez y no en cada solicitud. Las IPs individuales se
+    convierten en redes de un solo host (/32 o /128).
+    
+    Args:
+        allowed_ips: IPs o rangos permitidos (ver get_allowed_ips)
+        
+    Returns:
+        tuple: Redes permitidas (IPv4Network / IPv6Network)
+    """
+    networks = []
+    for allowed_ip in allowed_ips:
+        try:
+            networks.append(ipaddress.ip_network(allowed_ip, strict=False))
+        except ValueError:
+            # Si hay un error al parsear la IP, ignorarla
+            logger.warning(f"IP o rango inválido en ALLOWED_IPS: {allowed_ip}")
+    return tuple(networks)
+
+
+def reload_config():
+    """
+    Vuelve a leer la configuración desde el archivo .env y el entorno.
+    
+    Los valores de configuración se cachean tras la primera lectura;
+    esta función limpia esas cachés para que la siguiente solicitud
+    use los valores actualizados.
+    
+    Igual que al iniciar, las variables de entorno reales tienen prioridad
+    sobre el archivo .env, que solo aporta las variables que faltan. Por
+    eso, si la configuración llega solo por el entorno (ej: env_file de
+    docker-compose), no hay nada nuevo que leer sin reiniciar. Además,
+    solo afecta al proceso que la ejecuta: con varios workers, cada uno
+    mantiene sus propias cachés.
+    """
+    load_dotenv()
+    get_api_key.cache_clear()
+    get_allowed_ips.cache_clear()
+    parse_allowed_networks.cache_clear()
+    get_smtp_config.cache_clear()
+    logger.info("Configuración recargada")
+
+
 def verify_ip_address(client_ip: str) -> bool:
     """
     Verifica si la IP del cliente está en la lista de IPs permitidas.
@@ -104,26 +180,51 @@ def verify_ip_address(client_ip: str) -> bool:
     if client_ip in ['127.0.0.1', '::1', 'localhost']:
         client_ip = '127.0.0.1'
     
-    # Verificar cada IP o rango permitido
-    for allowed_ip in allowed_ips:
-        try:
-            # Si es un rango CIDR
-            if '/' in allowed_ip:
-                if ipaddress.ip_address(client_ip) in ipaddress.ip_network(allowed_ip, strict=False):
-                    return True
-            # Si es una IP individual
-            else:
-                if client_ip == allowed_ip:
-                    return True
-        except ValueError:
-            # Si hay un error al parsear la IP, continuar con la siguiente
-            logger.warning(f"IP o rango inválido en ALLOWED_IPS: {allowed_ip}")
-            continue
+    # Parsear la IP del cliente una sola vez
+    try:
+        ip = ipaddress.ip_address(client_ip)
+    except ValueError:
+        return False
     
-    return False
+    # Verificar contra cada IP o rango permitido (ya parseados)
+    return any(ip in network for network in parse_allowed_networks(allowed_ips))
+
+
+def is_private_ip(client_ip: str) -> bool:
+    """
+    Verifica si la IP del cliente pertenece a una red privada (RFC 1918).
+    
+    Args:
+        client_ip: IP del cliente a verificar
+        
+    Returns:
+        bool: True si la IP es privada, False si no lo es o no es válida
+    """
+    try:
+        ip = ipaddress.ip_address(client_ip)
+    except ValueError:
+        return False
+    return any(ip in network for network in PRIVATE_NETWORKS)
+
+
+def first_forwarded_ip(forwarded_for: str) -> str:
+    """
+    Obtiene la primera IP (la del cliente original) del header X-Forwarded-For.
+    
+    Busca la primera coma en lugar de usar split(), que crearía una lista
+    con todas las IPs aunque normalmente solo haya una.
+    
+    Args:
+        forwarded_for: Valor del header X-Forwarded-For
+        
+    Returns:
+        str: Primera IP de la lista
+    """
+    comma = forwarded_for.find(',')
+    return (forwarded_for if comma == -1 else forwarded_for[:comma]).strip()
 
 
-def verify_api_key(api_key: Optional[str] = Security(api_key_header)) -> str:
+def verify_api_key(api_key: Annotated[Optional[str], Security(api_key_header)]) -> str:
     """
     Verifica que la API Key proporcionada sea válida.
     
@@ -153,7 +254,8 @@ def verify_api_key(api_key: Optional[str] = Security(api_key_header)) -> str:
             headers={"WWW-Authenticate": "ApiKey"},
         )
     
-    if api_key != expected_api_key:
+    # Comparación en tiempo constante para no filtrar información por tiempos
+    if not hmac.compare_digest(api_key.encode(), expected_api_key.encode()):
         logger.warning(f"Intento de acceso con API Key inválida desde IP desconocida")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -164,7 +266,7 @@ def verify_api_key(api_key: Optional[str] = Security(api_key_header)) -> str:
     return api_key
 
 
-def verify_access(request: Request, api_key: str = Depends(verify_api_key)) -> str:
+def verify_access(request: Request, api_key: Annotated[str, Depends(verify_api_key)]) -> str:
     """
     Verifica tanto la API Key como la IP del cliente.
     
@@ -183,21 +285,8 @@ def verify_access(request: Request, api_key: str = Depends(verify_api_key)) -> s
     Raises:
         HTTPException: Si la IP no está permitida o la API Key es inválida
     """
-    # Obtener la IP del cliente
-    # FastAPI puede obtener la IP desde diferentes headers dependiendo del proxy
-    client_ip = request.client.host if request.client else "unknown"
-    
-    # Si hay un proxy (como nginx, cloudflare, etc.), la IP real puede estar en headers
-    # X-Forwarded-For contiene la IP original del cliente
-    forwarded_for = request.headers.get("X-Forwarded-For")
-    if forwarded_for:
-        # X-Forwarded-For puede contener múltiples IPs, la primera es la original
-        client_ip = forwarded_for.split(",")[0].strip()
-    
-    # También verificar X-Real-IP (usado por algunos proxies)
-    real_ip = request.headers.get("X-Real-IP")
-    if real_ip:
-        client_ip = real_ip.strip()
+    # Obtener la IP del cliente (considerando proxies, ver get_client_ip)
+    client_ip = get_client_ip(request)
     
     # Si la IP es de una red Docker (172.x.x.x, 192.168.x.x comunes en Docker)
     # y 127.0.0.1 está en la whitelist, permitir el acceso
@@ -205,9 +294,7 @@ def verify_access(request: Request, api_key: str = Depends(verify_api_key)) -> s
     allowed_ips = get_allowed_ips()
     if "127.0.0.1" in allowed_ips:
         # Verificar si es una IP de red Docker común
-        if (client_ip.startswith("172.") or 
-            client_ip.startswith("192.168.") or 
-            client_ip.startswith("10.")):
+        if is_private_ip(client_ip):
             # Si es una IP de red privada y localhost está permitido, permitir acceso
             logger.info(f"Acceso desde red Docker/privada ({client_ip}) permitido porque localhost está en whitelist")
             return api_key
@@ -224,6 +311,44 @@ def verify_access(request: Request, api_key: str = Depends(verify_api_key)) -> s
     return api_key
 
 
+# API Key validada junto con la IP del cliente
+# Los endpoints protegidos declaran un parámetro de este tipo para exigir
+# la verificación de verify_access
+VerifiedKey = Annotated[str, Depends(verify_access)]
+
+
+def resolve_client_ip(
+    client_host: Optional[str],
+    forwarded_for: Optional[str],
+    real_ip: Optional[str]
+) -> str:
+    """
+    Determina la IP real del cliente a partir de la conexión y los headers.
+    
+    Si hay un proxy (como nginx, cloudflare, etc.), la IP real puede estar
+    en X-Forwarded-For o X-Real-IP; X-Real-IP tiene prioridad.
+    
+    Args:
+        client_host: IP de la conexión directa (o None si no se conoce)
+        forwarded_for: Valor del header X-Forwarded-For (o None)
+        real_ip: Valor del header X-Real-IP (o None)
+        
+    Returns:
+        str: IP del cliente, o "unknown" si no se puede determinar
+    """
+    client_ip = client_host or "unknown"
+    
+    # X-Forwarded-For puede contener múltiples IPs, la primera es la original
+    if forwarded_for:
+        client_ip = first_forwarded_ip(forwarded_for)
+    
+    # También verificar X-Real-IP (usado por algunos proxies)
+    if real_ip:
+        client_ip = real_ip.strip()
+    
+    return client_ip
+
+
 def get_client_ip(request: Request) -> str:
     """
     Obtiene la IP real del cliente desde la solicitud.
@@ -235,75 +360,104 @@ def get_client_ip(request: Request) -> str:
     Returns:
         str: IP del cliente
     """
-    client_ip = request.client.host if request.client else "unknown"
+    return resolve_client_ip(
+        request.client.host if request.client else None,
+        request.headers.get("X-Forwarded-For"),
+        request.headers.get("X-Real-IP")
+    )
+
+
+def get_scope_client_ip(scope: Scope) -> str:
+    """
+    Obtiene la IP real del cliente directamente desde el scope ASGI.
     
-    # Si hay un proxy, la IP real puede estar en headers
-    forwarded_for = request.headers.get("X-Forwarded-For")
-    if forwarded_for:
-        client_ip = forwarded_for.split(",")[0].strip()
+    Lee los headers como la lista de tuplas de bytes del scope, sin
+    construir objetos Request ni Headers de Starlette.
     
-    real_ip = request.headers.get("X-Real-IP")
-    if real_ip:
-        client_ip = real_ip.strip()
+    Args:
+        scope: Scope ASGI de la solicitud HTTP
+        
+    Returns:
+        str: IP del cliente
+    """
+    forwarded_for = None
+    real_ip = None
     
-    return client_ip
+    # Los nombres de los headers en el scope ASGI están en minúsculas
+    for name, value in scope["headers"]:
+        if name == b"x-forwarded-for" and forwarded_for is None:
+            forwarded_for = value.decode("latin-1")
+        elif name == b"x-real-ip" and real_ip is None:
+            real_ip = value.decode("latin-1")
+    
+    client = scope.get("client")
+    return resolve_client_ip(client[0] if client else None, forwarded_for, real_ip)
 
 
-class DocsAccessMiddleware(BaseHTTPMiddleware):
+class DocsAccessMiddleware:
     """
     Middleware para restringir el acceso a la documentación (Swagger/ReDoc)
     solo a las IPs permitidas.
     
     Este middleware intercepta las solicitudes a /docs y /redoc y verifica
     que la IP del cliente esté en la whitelist antes de permitir el acceso.
+    
+    Es un middleware ASGI puro (en lugar de BaseHTTPMiddleware), así las
+    solicitudes que no son de documentación pasan a la aplicación sin
+    crear tareas ni streams adicionales por cada solicitud.
     """
     
-    async def dispatch(self, request: Request, call_next):
-        # Rutas de documentación que queremos proteger
-        docs_paths = ["/docs", "/redoc", "/openapi.json"]
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Camino rápido: las rutas que no son de documentación pasan directo
+        # (startswith con una tupla compara todos los prefijos en una sola llamada)
+        if scope["type"] != "http" or not scope["path"].startswith(DOCS_PATHS):
+            await self.app(scope, receive, send)
+            return
         
-        # Verificar si la ruta es de documentación
-        if any(request.url.path.startswith(path) for path in docs_paths):
-            client_ip = get_client_ip(request)
-            
-            # Obtener IPs permitidas
-            allowed_ips = get_allowed_ips()
-            
-            # Si no hay IPs configuradas, permitir todas (modo desarrollo)
-            if not allowed_ips:
-                logger.warning("No hay IPs permitidas configuradas. Permitindo acceso a documentación desde todas las IPs.")
-                return await call_next(request)
-            
-            # Verificar si la IP está permitida
-            # Si 127.0.0.1 está permitido, también permitir IPs de red Docker/privada
-            ip_allowed = False
-            
-            if "127.0.0.1" in allowed_ips:
-                # Permitir localhost y redes Docker/privadas
-                if (client_ip in ['127.0.0.1', '::1', 'localhost'] or
-                    client_ip.startswith("172.") or
-                    client_ip.startswith("192.168.") or
-                    client_ip.startswith("10.")):
-                    ip_allowed = True
-                    logger.info(f"Acceso a documentación desde red Docker/privada ({client_ip}) permitido porque localhost está en whitelist")
-            
-            # Si no se permitió por la regla anterior, verificar normalmente
-            if not ip_allowed:
-                ip_allowed = verify_ip_address(client_ip)
-            
-            if not ip_allowed:
-                logger.warning(f"Intento de acceso a documentación desde IP no permitida: {client_ip}")
-                return JSONResponse(
-                    status_code=status.HTTP_403_FORBIDDEN,
-                    content={
-                        "detail": f"Acceso denegado. Tu IP ({client_ip}) no está autorizada para acceder a la documentación."
-                    }
-                )
-            
-            logger.info(f"Acceso a documentación autorizado desde IP: {client_ip}")
+        client_ip = get_scope_client_ip(scope)
+        
+        # Obtener IPs permitidas
+        allowed_ips = get_allowed_ips()
+        
+        # Si no hay IPs configuradas, permitir todas (modo desarrollo)
+        if not allowed_ips:
+            logger.warning("No hay IPs permitidas configuradas. Permitindo acceso a documentación desde todas las IPs.")
+            await self.app(scope, receive, send)
+            return
+        
+        # Verificar si la IP está permitida
+        # Si 127.0.0.1 está permitido, también permitir IPs de red Docker/privada
+        ip_allowed = False
+        
+        if "127.0.0.1" in allowed_ips:
+            # Permitir localhost y redes Docker/privadas
+            if (client_ip in ['127.0.0.1', '::1', 'localhost'] or
+                is_private_ip(client_ip)):
+                ip_allowed = True
+                logger.info(f"Acceso a documentación desde red Docker/privada ({client_ip}) permitido porque localhost está en whitelist")
+        
+        # Si no se permitió por la regla anterior, verificar normalmente
+        if not ip_allowed:
+            ip_allowed = verify_ip_address(client_ip)
+        
+        if not ip_allowed:
+            logger.warning(f"Intento de acceso a documentación desde IP no permitida: {client_ip}")
+            response = ORJSONResponse(
+                status_code=status.HTTP_403_FORBIDDEN,
+                content={
+                    "detail": f"Acceso denegado. Tu IP ({client_ip}) no está autorizada para acceder a la documentación."
+                }
+            )
+            await response(scope, receive, send)
+            return
+        
+        logger.info(f"Acceso a documentación autorizado desde IP: {client_ip}")
         
         # Continuar con la solicitud
-        return await call_next(request)
+        await self.app(scope, receive, send)
 
 
 # Crear instancia de FastAPI
@@ -318,13 +472,17 @@ app = FastAPI(
     
     * Envío de correos con asunto, cuerpo y destinatarios
     * Soporte para múltiples destinatarios
+    * Envío de varios correos en lote con una sola conexión SMTP
     * Soporte para archivos adjuntos
     * Validación de datos de entrada
     * Documentación automática con Swagger/OpenAPI (acceso restringido por IP)
     """,
     version="1.0.0",
     docs_url="/docs",  # Ruta para la documentación interactiva (Swagger UI)
-    redoc_url="/redoc"  # Ruta para la documentación alternativa (ReDoc)
+    redoc_url="/redoc",  # Ruta para la documentación alternativa (ReDoc)
+    # orjson serializa las respuestas JSON en código nativo, mucho más
+    # rápido que el módulo json estándar
+    default_response_class=ORJSONResponse
 )
 
 # Agregar middleware para restringir acceso a la documentación
@@ -342,6 +500,11 @@ class Attachment(BaseModel):
     """
     Modelo para representar un archivo adjunto.
     
+    El contenido se recibe codificado en base64 (para poder transmitirlo
+    como texto en JSON) y se mantiene así hasta el envío: el correo
+    también transporta los adjuntos en base64, por lo que no hace falta
+    decodificarlo y volver a codificarlo.
+    
     Attributes:
         filename: Nombre del archivo
         content: Contenido del archivo en base64
@@ -354,6 +517,22 @@ class Attachment(BaseModel):
         description="Tipo MIME del archivo (ej: application/pdf, image/png)"
     )
 
+    @validator('content', pre=True)
+    def validate_content(cls, v):
+        """
+        Valida el contenido base64 del adjunto.
+        
+        Se eliminan los saltos de línea y espacios (por ejemplo, los que
+        agrega el comando base64) y se verifica la forma del texto: solo
+        caracteres base64, relleno "=" al final y longitud múltiplo de 4.
+        No se decodifica el contenido, ya que se envía tal cual en base64.
+        """
+        if isinstance(v, str):
+            v = WHITESPACE_PATTERN.sub('', v)
+            if len(v) % 4 != 0 or not BASE64_PATTERN.fullmatch(v):
+                raise ValueError('Contenido base64 inválido')
+        return v
+
 
 class EmailRequest(BaseModel):
     """
@@ -426,10 +605,54 @@ class EmailResponse(BaseModel):
     recipients: List[str]
 
 
+# Máximo de correos por solicitud de lote: cada lote ocupa una conexión
+# del pool SMTP hasta terminar, así un lote muy grande no la acapara
+SMTP_BATCH_MAX_EMAILS = int(os.getenv('SMTP_BATCH_MAX_EMAILS', '100'))
+if SMTP_BATCH_MAX_EMAILS < 1:
+    # Con 0 o menos todas las solicitudes a /send-emails se rechazarían con 422
+    raise ValueError(f"SMTP_BATCH_MAX_EMAILS debe ser al menos 1 (recibido: {SMTP_BATCH_MAX_EMAILS})")
+
+
+class BatchEmailRequest(BaseModel):
+    """
+    Modelo para la solicitud de envío de varios correos en lote.
+    
+    Attributes:
+        emails: Lista de correos a enviar
+    """
+    emails: List[EmailRequest] = Field(
+        ...,
+        min_items=1,
+        max_items=SMTP_BATCH_MAX_EMAILS,
+        description="Lista de correos a enviar usando una sola conexión SMTP"
+    )
+
+
+class BatchEmailResponse(BaseModel):
+    """
+    Modelo para la respuesta del envío de correos en lote.
+    
+    Attributes:
+        success: Indica si todos los correos del lote se enviaron
+        message: Mensaje descriptivo del resultado
+        timestamp: Fecha y hora del envío
+        results: Resultado del envío de cada correo
+    """
+    success: bool
+    message: str
+    timestamp: str
+    results: List[EmailResponse]
+
+
 # ============================================================================
 # FUNCIONES AUXILIARES
 # ============================================================================
 
+# Claves de la configuración SMTP que deben estar definidas
+SMTP_REQUIRED_VARS = ('smtp_server', 'smtp_user', 'smtp_password', 'smtp_from_email')
+
+
+@lru_cache(maxsize=1)
 def get_smtp_config():
     """
     Obtiene la configuración SMTP desde variables de entorno.
@@ -437,6 +660,11 @@ def get_smtp_config():
     Las variables de entorno se cargan desde el archivo .env
     usando python-dotenv (se carga automáticamente en el Dockerfile).
     
+    La configuración se cachea tras la primera lectura válida; usa
+    reload_config() para volver a leerla. Si falta alguna variable no
+    se cachea nada, así el error se vuelve a evaluar en la siguiente
+    llamada.
+    
     Returns:
         dict: Diccionario con la configuración SMTP
         
@@ -457,10 +685,9 @@ def get_smtp_config():
     }
     
     # Validar que las variables requeridas estén definidas
-    required_vars = ['smtp_server', 'smtp_user', 'smtp_password', 'smtp_from_email']
-    missing_vars = [var for var in required_vars if not config[var]]
-    
-    if missing_vars:
+    # La lista de faltantes solo se construye si falta alguna
+    if not all(config[var] for var in SMTP_REQUIRED_VARS):
+        missing_vars = [var for var in SMTP_REQUIRED_VARS if not config[var]]
         raise ValueError(
             f"Variables de entorno faltantes: {', '.join(missing_vars)}. "
             "Por favor, configura el archivo .env"
@@ -469,29 +696,459 @@ def get_smtp_config():
     return config
 
 
-def decode_base64_attachment(attachment: Attachment) -> bytes:
+@lru_cache(maxsize=1)
+def get_from_header(from_email: str):
     """
-    Decodifica el contenido de un adjunto desde base64.
+    Crea el header From ya procesado para la dirección del remitente.
     
-    Los archivos adjuntos se envían codificados en base64 para
-    poder transmitirlos como texto en JSON.
+    El remitente es el mismo en todos los correos; asignar el header ya
+    procesado a cada mensaje evita volver a analizar la dirección en cada
+    envío. Los objetos header son inmutables, así que se pueden compartir.
     
     Args:
-        attachment: Objeto Attachment con el contenido en base64
+        from_email: Dirección del remitente (SMTP_FROM_EMAIL)
         
     Returns:
-        bytes: Contenido del archivo decodificado
+        Header From listo para asignarse con msg['From'] = ...
+    """
+    return policy.SMTP.header_factory('From', from_email)
+
+
+def wrap_base64(content: str) -> str:
+    """
+    Divide el texto base64 en líneas de 76 caracteres.
+    
+    El estándar MIME limita las líneas a 76 caracteres, y los servidores
+    SMTP rechazan líneas demasiado largas.
+    
+    Args:
+        content: Texto base64 sin saltos de línea
         
-    Raises:
-        ValueError: Si el contenido base64 no es válido
+    Returns:
+        str: Texto base64 en líneas de 76 caracteres
+    """
+    return '\n'.join(content[i:i + 76] for i in range(0, len(content), 76))
+
+
+def split_content_type(content_type: Optional[str]) -> tuple:
+    """
+    Separa un tipo MIME en su tipo principal y subtipo.
+    
+    Args:
+        content_type: Tipo MIME (ej: "application/pdf"), puede ser None
+        
+    Returns:
+        tuple: (maintype, subtype); ("application", "octet-stream") si el
+        tipo no se especificó o no es válido
+    """
+    if content_type:
+        # Ignorar parámetros como "; charset=utf-8"
+        maintype, _, subtype = content_type.split(';', 1)[0].strip().partition('/')
+        if maintype and subtype:
+            return maintype.lower(), subtype.lower()
+    return 'application', 'octet-stream'
+
+
+def build_message(
+    smtp_config: dict,
+    subject: str,
+    body: str,
+    recipients: List[str],
+    attachments: Optional[List[Attachment]] = None,
+    is_html: bool = False
+) -> EmailMessage:
+    """
+    Construye el mensaje MIME de un correo electrónico.
+    
+    Args:
+        smtp_config: Configuración SMTP (ver get_smtp_config)
+        subject: Asunto del correo
+        body: Cuerpo del correo
+        recipients: Lista de destinatarios
+        attachments: Lista opcional de archivos adjuntos
+        is_html: Si es True, el cuerpo se trata como HTML
+        
+    Returns:
+        EmailMessage: Mensaje listo para enviar
+    """
+    # Crear el mensaje
+    # EmailMessage es la API moderna del paquete email. Al enviarlo,
+    # aiosmtplib lo vuelve a serializar con su propia política (ignora
+    # msg.policy), así que policy.SMTP solo afecta a as_bytes()/as_string()
+    msg = EmailMessage(policy=policy.SMTP)
+    msg['From'] = get_from_header(smtp_config['smtp_from_email'])
+    msg['To'] = ', '.join(recipients)  # Múltiples destinatarios separados por coma
+    msg['Subject'] = subject
+    
+    # Agregar el cuerpo del mensaje
+    # El subtipo indica el formato: 'plain' para texto, 'html' para HTML
+    msg.set_content(body, subtype='html' if is_html else 'plain', charset='utf-8')
+    
+    # Agregar archivos adjuntos si los hay
+    if attachments:
+        # Convertir el mensaje en multipart/mixed (el cuerpo pasa a ser la
+        # primera parte) para poder agregar los adjuntos como partes
+        msg.make_mixed()
+        
+        for attachment in attachments:
+            # El contenido ya está en base64, así que se usa tal cual como
+            # payload y solo se declara la codificación, en lugar de
+            # decodificarlo y que el mensaje lo vuelva a codificar
+            maintype, subtype = split_content_type(attachment.content_type)
+            part = MIMEPart(policy=msg.policy)
+            part['Content-Type'] = f'{maintype}/{subtype}'
+            part['Content-Transfer-Encoding'] = 'base64'
+            
+            # Content-Disposition indica que es un adjunto y su nombre
+            part.add_header(
+                'Content-Disposition',
+                'attachment',
+                filename=attachment.filename
+            )
+            part.set_payload(wrap_base64(attachment.content))
+            
+            # Adjuntar al mensaje
+            msg.attach(part)
+    
+    return msg
+
+
+async def build_message_async(
+    smtp_config: dict,
+    subject: str,
+    body: str,
+    recipients: List[str],
+    attachments: Optional[List[Attachment]] = None,
+    is_html: bool = False
+) -> EmailMessage:
+    """
+    Construye el mensaje (ver build_message) sin bloquear el event loop.
+    
+    Preparar los adjuntos recorre todo su contenido, así que los mensajes
+    con adjuntos se construyen en un hilo aparte mientras el event loop
+    sigue atendiendo otras solicitudes. Los mensajes sin
+    adjuntos se construyen directamente, ya que son baratos.
+    
+    Returns:
+        EmailMessage: Mensaje listo para enviar
+    """
+    if attachments:
+        return await asyncio.to_thread(
+            build_message, smtp_config, subject, body, recipients, attachments, is_html
+        )
+    return build_message(smtp_config, subject, body, recipients, attachments, is_html)
+
+
+# Número máximo de conexiones SMTP abiertas al mismo tiempo
+SMTP_POOL_SIZE = int(os.getenv('SMTP_POOL_SIZE', '4'))
+if SMTP_POOL_SIZE < 1:
+    # Con un semáforo de tamaño 0 ningún envío obtendría nunca una conexión
+    raise ValueError(f"SMTP_POOL_SIZE debe ser al menos 1 (recibido: {SMTP_POOL_SIZE})")
+
+# Mensajes que se envían por una misma conexión antes de renovarla
+# (muchos proveedores limitan los mensajes por sesión)
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', '100'))
+if SMTP_MAX_MESSAGES_PER_CONNECTION < 1:
+    # Con 0 o menos cada envío cerraría su conexión y cada correo de un
+    # lote abriría una nueva
+    raise ValueError(
+        f"SMTP_MAX_MESSAGES_PER_CONNECTION debe ser al menos 1 (recibido: {SMTP_MAX_MESSAGES_PER_CONNECTION})"
+    )
+
+# Segundos que una conexión puede quedar inactiva en el pool antes de cerrarla
+SMTP_IDLE_TIMEOUT = float(os.getenv('SMTP_IDLE_TIMEOUT', '100'))
+if SMTP_IDLE_TIMEOUT <= 0:
+    # El limpiador de conexiones inactivas espera SMTP_IDLE_TIMEOUT / 2 entre
+    # pasadas; con 0 o menos ocuparía el event loop en un ciclo sin pausa
+    raise ValueError(f"SMTP_IDLE_TIMEOUT debe ser mayor que 0 (recibido: {SMTP_IDLE_TIMEOUT})")
+
+
+async def connect_smtp(smtp_config: dict) -> aiosmtplib.SMTP:
+    """
+    Abre una conexión autenticada con el servidor SMTP.
+    
+    Args:
+        smtp_config: Configuración SMTP (ver get_smtp_config)
+        
+    Returns:
+        aiosmtplib.SMTP: Conexión lista para enviar mensajes
     """
+    # aiosmtplib es un cliente SMTP asíncrono: mientras espera al servidor
+    # no bloquea el event loop, así otras solicitudes siguen atendiéndose
+    
+    # El puerto 465 usa SSL directamente (use_tls=True)
+    # Los puertos 587 y otros usan TLS con starttls()
+    server = aiosmtplib.SMTP(
+        hostname=smtp_config['smtp_server'],
+        port=smtp_config['smtp_port'],
+        use_tls=smtp_config['smtp_use_ssl'],
+        start_tls=False
+    )
+    await server.connect()
+    
     try:
-        return base64.b64decode(attachment.content)
-    except Exception as e:
-        raise ValueError(f"Error al decodificar el adjunto {attachment.filename}: {str(e)}")
+        # Iniciar conexión TLS si está configurado
+        # TLS (Transport Layer Security) encripta la conexión
+        # Se usa típicamente con el puerto 587
+        if not smtp_config['smtp_use_ssl'] and smtp_config['smtp_use_tls']:
+            await server.starttls()
+        
+        # Autenticarse en el servidor SMTP
+        await server.login(
+            smtp_config['smtp_user'],
+            smtp_config['smtp_password']
+        )
+    except Exception:
+        server.close()
+        raise
+    
+    return server
+
+
+def get_smtp_config_key(smtp_config: dict) -> tuple:
+    """
+    Identifica el servidor y la cuenta a los que pertenece una conexión.
+    
+    Args:
+        smtp_config: Configuración SMTP (ver get_smtp_config)
+        
+    Returns:
+        tuple: (servidor, puerto, usuario)
+    """
+    return (
+        smtp_config['smtp_server'],
+        smtp_config['smtp_port'],
+        smtp_config['smtp_user']
+    )
+
+
+class PooledSMTPConnection:
+    """
+    Conexión SMTP del pool junto con su historial de uso.
+    
+    Attributes:
+        server: Conexión aiosmtplib ya autenticada
+        key: Servidor, puerto y usuario de la conexión (ver get_smtp_config_key)
+        messages_sent: Mensajes enviados por esta conexión
+        last_used: Momento del último uso (según time.monotonic())
+    """
+    
+    def __init__(self, server: aiosmtplib.SMTP, key: tuple):
+        self.server = server
+        self.key = key
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+    
+    @property
+    def exhausted(self) -> bool:
+        """Indica si la conexión alcanzó el máximo de mensajes por conexión."""
+        return self.messages_sent >= SMTP_MAX_MESSAGES_PER_CONNECTION
+    
+    def idle_for(self, now: float) -> float:
+        """Segundos transcurridos desde el último uso de la conexión."""
+        return now - self.last_used
+    
+    async def send_message(self, msg: EmailMessage, sender: str, recipients: List[str]):
+        """
+        Envía un mensaje por esta conexión y actualiza su historial.
+        
+        El remitente y los destinatarios del sobre SMTP (MAIL FROM / RCPT TO)
+        se pasan explícitamente, así no se vuelven a extraer de los headers
+        From y To del mensaje.
+        
+        Args:
+            msg: Mensaje a enviar
+            sender: Dirección del remitente
+            recipients: Direcciones de los destinatarios
+        """
+        await self.server.send_message(msg, sender=sender, recipients=recipients)
+        self.messages_sent += 1
+        self.last_used = time.monotonic()
+    
+    async def renew(self, smtp_config: dict):
+        """
+        Cierra la conexión y abre una nueva en su lugar.
+        
+        Se usa cuando la conexión alcanza el máximo de mensajes en medio
+        de un lote.
+        
+        Args:
+            smtp_config: Configuración SMTP (ver get_smtp_config)
+        """
+        await self.quit()
+        self.server = await connect_smtp(smtp_config)
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+    
+    async def is_alive(self) -> bool:
+        """
+        Verifica con un NOOP que el servidor siga respondiendo.
+        
+        Los servidores SMTP cierran las conexiones inactivas; el NOOP
+        detecta esas conexiones antes de intentar enviar por ellas.
+        
+        Returns:
+            bool: True si el servidor respondió 250
+        """
+        if not self.server.is_connected:
+            return False
+        try:
+            response = await self.server.noop()
+        except (aiosmtplib.SMTPException, OSError):
+            return False
+        return response.code == 250
+    
+    async def quit(self):
+        """Cierra la conexión con QUIT, o la corta si el servidor no responde."""
+        try:
+            await self.server.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SMTPConnectionPool:
+    """
+    Pool de conexiones SMTP ya autenticadas que se reutilizan entre envíos.
+    
+    Abrir una conexión SMTP requiere varios viajes de ida y vuelta al
+    servidor (conexión TCP, TLS y autenticación). El pool mantiene hasta
+    `size` conexiones abiertas y un semáforo limita cuántos envíos usan
+    el servidor al mismo tiempo.
+    
+    Cada conexión se valida con NOOP antes de prestarla, se renueva tras
+    SMTP_MAX_MESSAGES_PER_CONNECTION mensajes y se cierra si queda
+    inactiva más de SMTP_IDLE_TIMEOUT segundos.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._connections: List[PooledSMTPConnection] = []
+        self._semaphore = asyncio.Semaphore(size)
+    
+    async def fill(self):
+        """
+        Abre conexiones hasta completar el tamaño del pool.
+        
+        Raises:
+            ValueError: Si la configuración SMTP no está completa
+            aiosmtplib.SMTPException: Si no se puede conectar al servidor
+        """
+        smtp_config = get_smtp_config()
+        key = get_smtp_config_key(smtp_config)
+        while len(self._connections) < self.size:
+            server = await connect_smtp(smtp_config)
+            self._connections.append(PooledSMTPConnection(server, key))
+    
+    async def _acquire(self, smtp_config: dict) -> PooledSMTPConnection:
+        """
+        Toma la conexión libre más reciente que siga siendo válida,
+        o abre una nueva si no hay ninguna.
+        """
+        key = get_smtp_config_key(smtp_config)
+        
+        while self._connections:
+            connection = self._connections.pop()
+            
+            # Descartar conexiones de otra configuración, inactivas
+            # demasiado tiempo o que ya no responden
+            if (connection.key == key and
+                connection.idle_for(time.monotonic()) < SMTP_IDLE_TIMEOUT and
+                await connection.is_alive()):
+                return connection
+            
+            connection.server.close()
+        
+        server = await connect_smtp(smtp_config)
+        return PooledSMTPConnection(server, key)
+    
+    @asynccontextmanager
+    async def lease(self):
+        """
+        Presta una conexión del pool durante un bloque `async with`.
+        
+        Si el servidor rechazó el correo (SMTPResponseException o
+        SMTPRecipientsRefused), aiosmtplib ya reinició la transacción con
+        RSET y la conexión se devuelve al pool. Ante cualquier otro error
+        (desconexión, timeout, OSError, cancelación) se descarta, ya que
+        puede haber quedado en un estado inválido.
+        
+        Yields:
+            PooledSMTPConnection: Conexión lista para enviar mensajes
+        """
+        async with self._semaphore:
+            connection = await self._acquire(get_smtp_config())
+            
+            try:
+                yield connection
+            except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused):
+                await self._release(connection)
+                raise
+            except BaseException:
+                connection.server.close()
+                raise
+            
+            await self._release(connection)
+    
+    async def _release(self, connection: PooledSMTPConnection):
+        """Devuelve una conexión prestada al pool, o la cierra si ya no sirve."""
+        # Las conexiones cerradas durante el bloque (ej: un lote que
+        # perdió la conexión, o un 421 del servidor) se descartan
+        if not connection.server.is_connected:
+            return
+        
+        if connection.exhausted:
+            await connection.quit()
+        else:
+            self._connections.append(connection)
+    
+    async def prune_idle(self):
+        """Cierra las conexiones inactivas por más de SMTP_IDLE_TIMEOUT segundos."""
+        now = time.monotonic()
+        idle = [c for c in self._connections if c.idle_for(now) >= SMTP_IDLE_TIMEOUT]
+        if not idle:
+            return
+        
+        # Sacarlas del pool antes de cerrarlas, para que no se presten mientras tanto
+        self._connections = [c for c in self._connections if c not in idle]
+        for connection in idle:
+            await connection.quit()
+    
+    async def close(self):
+        """Cierra todas las conexiones abiertas del pool."""
+        while self._connections:
+            await self._connections.pop().quit()
+
+
+# Pool compartido por todos los envíos de la aplicación
+smtp_pool = SMTPConnectionPool(SMTP_POOL_SIZE)
 
 
-def send_email(
+async def prune_smtp_pool_periodically():
+    """Cierra periódicamente las conexiones SMTP inactivas del pool."""
+    while True:
+        await asyncio.sleep(SMTP_IDLE_TIMEOUT / 2)
+        await smtp_pool.prune_idle()
+
+
+@app.on_event("startup")
+async def open_smtp_pool():
+    """Abre las conexiones del pool SMTP al iniciar la aplicación."""
+    app.state.smtp_pool_pruner = asyncio.create_task(prune_smtp_pool_periodically())
+    try:
+        await smtp_pool.fill()
+    except (ValueError, aiosmtplib.SMTPException, OSError) as e:
+        # La API arranca igual; las conexiones se abrirán en el primer envío
+        logger.warning(f"No se pudo abrir el pool SMTP al iniciar: {str(e)}")
+
+
+@app.on_event("shutdown")
+async def close_smtp_pool():
+    """Cierra las conexiones del pool SMTP al detener la aplicación."""
+    app.state.smtp_pool_pruner.cancel()
+    await smtp_pool.close()
+
+
+async def send_email(
     subject: str,
     body: str,
     recipients: List[str],
@@ -502,11 +1159,8 @@ def send_email(
     Envía un correo electrónico usando SMTP.
     
     Esta función maneja todo el proceso de envío de correo:
-    1. Crea el mensaje MIME
-    2. Agrega el asunto, remitente y destinatarios
-    3. Agrega el cuerpo (texto o HTML)
-    4. Agrega los archivos adjuntos si los hay
-    5. Se conecta al servidor SMTP y envía el correo
+    1. Crea el mensaje MIME (ver build_message)
+    2. Toma una conexión del pool SMTP y envía el correo
     
     Args:
         subject: Asunto del correo
@@ -525,95 +1179,12 @@ def send_email(
         # Obtener configuración SMTP
         smtp_config = get_smtp_config()
         
-        # Crear mensaje MIME multipart
-        # MIMEMultipart permite agregar múltiples partes al mensaje
-        # (cuerpo de texto, HTML, adjuntos, etc.)
-        msg = MIMEMultipart()
-        msg['From'] = smtp_config['smtp_from_email']
-        msg['To'] = ', '.join(recipients)  # Múltiples destinatarios separados por coma
-        msg['Subject'] = subject
-        
-        # Agregar el cuerpo del mensaje
-        # MIMEText crea una parte de texto del mensaje
-        # El segundo parámetro indica el subtipo: 'plain' para texto, 'html' para HTML
-        msg.attach(MIMEText(body, 'html' if is_html else 'plain', 'utf-8'))
-        
-        # Agregar archivos adjuntos si los hay
-        if attachments:
-            for attachment in attachments:
-                # Decodificar el contenido del adjunto
-                file_content = decode_base64_attachment(attachment)
-                
-                # Crear parte MIME para el adjunto
-                part = MIMEBase('application', 'octet-stream')
-                part.set_payload(file_content)
-                
-                # Codificar el adjunto en base64 para el transporte
-                encoders.encode_base64(part)
-                
-                # Agregar headers al adjunto
-                # Content-Disposition indica que es un adjunto y su nombre
-                part.add_header(
-                    'Content-Disposition',
-                    f'attachment; filename= {attachment.filename}'
-                )
-                
-                # Si se especificó un content_type, usarlo
-                if attachment.content_type:
-                    part.set_type(attachment.content_type)
-                
-                # Adjuntar al mensaje
-                msg.attach(part)
-        
-        # Conectar al servidor SMTP y enviar el correo
-        # smtplib es la biblioteca estándar de Python para SMTP
-        
-        # El puerto 465 usa SSL directamente (SMTP_SSL)
-        # Los puertos 587 y otros usan TLS con starttls() (SMTP)
-        if smtp_config['smtp_use_ssl']:
-            # SMTP_SSL crea una conexión SSL desde el inicio
-            # Se usa típicamente con el puerto 465
-            with smtplib.SMTP_SSL(
-                smtp_config['smtp_server'],
-                smtp_config['smtp_port']
-            ) as server:
-                # Habilitar modo debug (opcional, útil para depuración)
-                # server.set_debuglevel(1)
-                
-                # Autenticarse en el servidor SMTP
-                server.login(
-                    smtp_config['smtp_user'],
-                    smtp_config['smtp_password']
-                )
-                
-                # Enviar el correo
-                # send_message envía el mensaje MIME completo
-                server.send_message(msg)
-        else:
-            # SMTP crea una conexión sin encriptar primero
-            # Luego se puede usar starttls() para encriptar (puerto 587)
-            with smtplib.SMTP(
-                smtp_config['smtp_server'],
-                smtp_config['smtp_port']
-            ) as server:
-                # Habilitar modo debug (opcional, útil para depuración)
-                # server.set_debuglevel(1)
-                
-                # Iniciar conexión TLS si está configurado
-                # TLS (Transport Layer Security) encripta la conexión
-                # Se usa típicamente con el puerto 587
-                if smtp_config['smtp_use_tls']:
-                    server.starttls()
-                
-                # Autenticarse en el servidor SMTP
-                server.login(
-                    smtp_config['smtp_user'],
-                    smtp_config['smtp_password']
-                )
-                
-                # Enviar el correo
-                # send_message envía el mensaje MIME completo
-                server.send_message(msg)
+        msg = await build_message_async(smtp_config, subject, body, recipients, attachments, is_html)
+        
+        async with smtp_pool.lease() as connection:
+            # Enviar el correo
+            # send_message envía el mensaje MIME completo
+            await connection.send_message(msg, smtp_config['smtp_from_email'], recipients)
         
         logger.info(f"Correo enviado exitosamente a {recipients}")
         
@@ -628,6 +1199,130 @@ def send_email(
         raise
 
 
+async def send_emails_batch(emails: List[EmailRequest]) -> List[dict]:
+    """
+    Envía varios correos electrónicos usando una sola conexión SMTP.
+    
+    La conexión se toma del pool una sola vez para todo el lote, en lugar
+    de una vez por correo; si alcanza SMTP_MAX_MESSAGES_PER_CONNECTION
+    mensajes se renueva sin interrumpir el lote.
+    
+    Si el servidor rechaza un correo (ej: destinatario inválido), se
+    registra el error en su resultado y se continúa con el siguiente
+    (aiosmtplib reinicia la transacción con RSET por su cuenta).
+    
+    Si se pierde la conexión a mitad del lote, el envío se detiene y los
+    correos pendientes (incluido el que estaba en curso) se informan como
+    no enviados; los ya enviados conservan su resultado.
+    
+    Args:
+        emails: Lista de correos a enviar
+        
+    Returns:
+        list: Resultado del envío de cada correo, en el mismo orden
+        
+    Raises:
+        Exception: Si no se puede obtener la conexión SMTP inicial
+    """
+    try:
+        # Obtener configuración SMTP
+        smtp_config = get_smtp_config()
+        
+        results = []
+        # Cómo se clasifican las excepciones de aiosmtplib en el lote:
+        # - ValueError, SMTPNotSupported (ej: dirección no ASCII sin SMTPUTF8):
+        #   el correo no llegó a enviarse; se registra y se sigue con el siguiente
+        # - SMTPResponseException (SMTPSenderRefused, SMTPRecipientRefused,
+        #   SMTPDataError...) y SMTPRecipientsRefused: el servidor rechazó el
+        #   correo y aiosmtplib ya envió RSET; se sigue con el siguiente
+        # - Cualquier otra SMTPException (SMTPServerDisconnected,
+        #   SMTPTimeoutError...) u OSError: se perdió la conexión
+        # - Cualquier error al renovar la conexión (incluidos
+        #   SMTPAuthenticationError y SMTPConnectResponseError, que también
+        #   son SMTPResponseException): se trata como conexión perdida, para
+        #   no reintentar el login con cada correo restante
+        connection_error = None
+        async with smtp_pool.lease() as connection:
+            for email in emails:
+                recipients = email.recipients
+                
+                if connection.exhausted:
+                    try:
+                        await connection.renew(smtp_config)
+                    except (aiosmtplib.SMTPException, OSError) as e:
+                        connection_error = e
+                        break
+                
+                try:
+                    # Los mensajes se construyen uno a uno para no mantener
+                    # todos los adjuntos del lote en memoria a la vez
+                    msg = await build_message_async(
+                        smtp_config,
+                        email.subject,
+                        email.body,
+                        recipients,
+                        email.attachments,
+                        email.is_html
+                    )
+                    await connection.send_message(msg, smtp_config['smtp_from_email'], recipients)
+                except (ValueError, aiosmtplib.SMTPNotSupported) as e:
+                    # Mensaje inválido (ej: header con saltos de línea) o que el
+                    # servidor no admite (ej: dirección no ASCII); no llegó al servidor
+                    logger.error(f"Error al construir correo para {recipients}: {str(e)}")
+                    results.append({
+                        'success': False,
+                        'message': f'Error al construir el correo: {str(e)}',
+                        'recipients': recipients
+                    })
+                    continue
+                except (aiosmtplib.SMTPResponseException, aiosmtplib.SMTPRecipientsRefused) as e:
+                    # El servidor rechazó este correo; aiosmtplib ya reinició la
+                    # transacción con RSET, así que se continúa con el siguiente
+                    logger.error(f"Correo rechazado para {recipients}: {str(e)}")
+                    results.append({
+                        'success': False,
+                        'message': f'El servidor SMTP rechazó el correo: {str(e)}',
+                        'recipients': recipients
+                    })
+                    # Tras un 421 el servidor cierra la conexión
+                    if not connection.server.is_connected:
+                        connection_error = e
+                        break
+                    continue
+                except (aiosmtplib.SMTPException, OSError) as e:
+                    connection_error = e
+                    break
+                
+                results.append({
+                    'success': True,
+                    'message': f'Correo enviado exitosamente a {len(recipients)} destinatario(s)',
+                    'recipients': recipients
+                })
+            
+            if connection_error is not None:
+                # Se perdió la conexión: los correos ya enviados se informan
+                # como enviados y el resto como no enviados, para que el
+                # cliente no los reenvíe duplicados. La conexión se cierra,
+                # así el pool no la vuelve a prestar
+                logger.error(f"Conexión SMTP perdida durante el lote: {str(connection_error)}")
+                connection.server.close()
+                for pending in emails[len(results):]:
+                    results.append({
+                        'success': False,
+                        'message': f'No se envió: se perdió la conexión con el servidor SMTP: {str(connection_error)}',
+                        'recipients': pending.recipients
+                    })
+        
+        sent = sum(1 for result in results if result['success'])
+        logger.info(f"Lote enviado: {sent} de {len(results)} correo(s) exitosamente")
+        
+        return results
+        
+    except Exception as e:
+        logger.error(f"Error al enviar lote de correos: {str(e)}")
+        raise
+
+
 # ============================================================================
 # ENDPOINTS DE LA API
 # ============================================================================
@@ -693,10 +1388,39 @@ async def health_check():
         )
 
 
+@app.post("/reload-config")
+async def reload_config_endpoint(api_key: VerifiedKey):
+    """
+    Endpoint para recargar la configuración sin reiniciar la API.
+    
+    La API Key, las IPs permitidas y la configuración SMTP se cachean tras
+    la primera lectura. Este endpoint vuelve a leer el archivo .env y
+    limpia esas cachés; las conexiones SMTP abiertas con la configuración
+    anterior se descartan en su siguiente uso.
+    
+    Limitaciones (ver reload_config): las variables de entorno reales no
+    se sobrescriben con el .env, y con WORKERS > 1 solo se recarga el
+    worker que atiende la solicitud.
+    
+    **SEGURIDAD**: Este endpoint requiere API Key válida e IP autorizada.
+    
+    Args:
+        api_key: API Key validada (proporcionada por la dependencia verify_access)
+        
+    Returns:
+        dict: Confirmación de la recarga
+    """
+    reload_config()
+    return {
+        "status": "reloaded",
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.post("/send-email", response_model=EmailResponse)
 async def send_email_endpoint(
     email_request: EmailRequest,
-    api_key: str = Depends(verify_access)
+    api_key: VerifiedKey
 ):
     """
     Endpoint principal para enviar correos electrónicos.
@@ -726,10 +1450,10 @@ async def send_email_endpoint(
     """
     try:
         # Enviar el correo
-        result = send_email(
+        result = await send_email(
             subject=email_request.subject,
             body=email_request.body,
-            recipients=[str(email) for email in email_request.recipients],
+            recipients=email_request.recipients,
             attachments=email_request.attachments,
             is_html=email_request.is_html
         )
@@ -745,19 +1469,103 @@ async def send_email_endpoint(
         return response
         
     except ValueError as e:
-        # Error de validación (ej: base64 inválido)
+        # Error de validación (ej: configuración SMTP incompleta)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
-    except smtplib.SMTPAuthenticationError as e:
+    except aiosmtplib.SMTPAuthenticationError as e:
         # Error de autenticación SMTP
         logger.error(f"Error de autenticación SMTP: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Error de autenticación SMTP. Verifica las credenciales."
         )
-    except smtplib.SMTPException as e:
+    except aiosmtplib.SMTPException as e:
+        # Otros errores SMTP
+        logger.error(f"Error SMTP: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail=f"Error al comunicarse con el servidor SMTP: {str(e)}"
+        )
+    except Exception as e:
+        # Error genérico
+        logger.error(f"Error inesperado: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error interno del servidor: {str(e)}"
+        )
+
+
+@app.post("/send-emails", response_model=BatchEmailResponse)
+async def send_emails_endpoint(
+    batch_request: BatchEmailRequest,
+    api_key: VerifiedKey
+):
+    """
+    Endpoint para enviar varios correos electrónicos en una sola solicitud.
+    
+    Todos los correos del lote se envían usando una sola conexión SMTP,
+    por lo que la conexión, el cifrado y la autenticación con el servidor
+    se hacen una sola vez en lugar de una vez por correo.
+    
+    Si el servidor rechaza algún correo, el resto del lote se envía igual;
+    el resultado de cada correo indica si se envió o el motivo del error.
+    Si se pierde la conexión a mitad del lote, los correos pendientes se
+    informan como no enviados.
+    
+    **SEGURIDAD**: Este endpoint requiere:
+    - API Key válida en el header X-API-Key
+    - IP del cliente en la whitelist de IPs permitidas
+    
+    Args:
+        batch_request: Lista de correos a enviar (validados automáticamente)
+        api_key: API Key validada (proporcionada por la dependencia verify_access)
+        
+    Returns:
+        BatchEmailResponse: Resultado del envío de cada correo
+        
+    Raises:
+        HTTPException: Si ocurre un error durante el envío, autenticación o autorización
+    """
+    try:
+        # Enviar los correos
+        results = await send_emails_batch(batch_request.emails)
+        
+        # Crear respuesta con timestamp
+        timestamp = datetime.now().isoformat()
+        sent = sum(1 for result in results if result['success'])
+        response = BatchEmailResponse(
+            success=sent == len(results),
+            message=f'{sent} de {len(results)} correo(s) enviado(s) exitosamente',
+            timestamp=timestamp,
+            results=[
+                EmailResponse(
+                    success=result['success'],
+                    message=result['message'],
+                    timestamp=timestamp,
+                    recipients=result['recipients']
+                )
+                for result in results
+            ]
+        )
+        
+        return response
+        
+    except ValueError as e:
+        # Error de validación (ej: configuración SMTP incompleta)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except aiosmtplib.SMTPAuthenticationError as e:
+        # Error de autenticación SMTP
+        logger.error(f"Error de autenticación SMTP: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Error de autenticación SMTP. Verifica las credenciales."
+        )
+    except aiosmtplib.SMTPException as e:
         # Otros errores SMTP
         logger.error(f"Error SMTP: {str(e)}")
         raise HTTPException(
@@ -787,16 +1595,25 @@ if __name__ == "__main__":
     ASGI (Asynchronous Server Gateway Interface) permite que FastAPI
     maneje múltiples solicitudes de forma asíncrona.
     """
+    import sys
     import uvicorn
     
     # uvicorn.run() inicia el servidor
     # host="0.0.0.0" permite acceso desde cualquier IP
-    # port=8000 es el puerto por defecto
-    # reload=True habilita recarga automática en desarrollo
+    # PORT define el puerto (8000 por defecto)
+    # DEV=1 habilita recarga automática en desarrollo; en producción se
+    # desactiva, ya que agrega un proceso que vigila los archivos
+    # WORKERS define cuántos procesos atienden solicitudes (cada uno con
+    # su propio pool SMTP)
+    # uvloop (event loop) y httptools (parser HTTP) están implementados en
+    # C y son más rápidos que las implementaciones por defecto; uvloop no
+    # está disponible en Windows
     uvicorn.run(
         "main:app",
         host="0.0.0.0",
-        port=8000,
-        reload=True
+        port=int(os.getenv("PORT", "8000")),
+        reload=os.getenv("DEV") == "1",
+        workers=int(os.getenv("WORKERS", "1")),
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools"
     )
-